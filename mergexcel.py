@@ -1,85 +1,146 @@
 import boto3
+import concurrent.futures
+import logging
 import pandas as pd
 import os
+import pickle
+import tempfile
+import xlsxwriter
 from io import BytesIO
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from dotenv import load_dotenv
+from openpyxl import load_workbook
+
+# Rust-backed calamine parses xlsx much faster than openpyxl; fall back to openpyxl if not installed
+try:
+    import python_calamine  # noqa: F401
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+# Arrow-backed strings take far less memory than boxed Python str objects and keep
+# .str operations in C; fall back to plain object columns if pyarrow is not installed
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = object
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Per-file details are logged at DEBUG; set LOG_LEVEL=DEBUG to see them
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+class BankLogger(logging.LoggerAdapter):
+    """
+    Prefix every message with the bank it is about. Files are read on worker threads,
+    so their messages interleave and can't rely on a preceding header line.
+    """
+    def process(self, msg, kwargs):
+        return f"  [{self.extra['bank']}] {msg.lstrip()}", kwargs
+
 # AWS credentials from environment variables
 aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
 aws_secret_access_key = os.getenv('AWS_SECRET_ACCESS_KEY')
 aws_region = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
 
+# Number of bank files downloaded and parsed concurrently
+MAX_WORKERS = int(os.getenv('S3_MAX_WORKERS', '16'))
+
+# Size the connection pool so worker threads don't queue on HTTPS connections
+s3_config = Config(max_pool_connections=32)
+
 # Initialize S3 client with credentials
 if aws_access_key_id and aws_secret_access_key:
     s3_client = boto3.client(
         's3',
         aws_access_key_id=aws_access_key_id,
         aws_secret_access_key=aws_secret_access_key,
-        region_name=aws_region
+        region_name=aws_region,
+        config=s3_config
     )
 else:
     # Fallback to default credentials (IAM role, AWS CLI config, etc.)
-    s3_client = boto3.client('s3', region_name=aws_region)
+    s3_client = boto3.client('s3', region_name=aws_region, config=s3_config)
 
 # Bucket name and folder paths from environment variables
 BUCKET_NAME = os.getenv('S3_BUCKET_NAME', 'mbf-los-stg')
 BASE_FOLDER = os.getenv('S3_BASE_FOLDER', 'bank_data/')
 
-def get_latest_xlsx_files_from_s3(bucket_name, base_folder):
-    """
-    Get the latest .xlsx files from the bank subfolders in S3.
-    """
-    latest_files = {}
+# Multipart upload settings for the merged file (parts are uploaded in parallel)
+UPLOAD_CONFIG = TransferConfig(multipart_chunksize=8 * 1024 * 1024, max_concurrency=8, use_threads=True)
 
-    # List all objects in the base folder (bank_data)
-    response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=base_folder)
+# Local cache of parsed bank files keyed by S3 ETag, so unchanged files are not re-downloaded or re-parsed.
+# Entries are pickles, so the default lives in the user's own cache dir, not the shared temp dir.
+CACHE_DIR = os.getenv('MERGE_CACHE_DIR') or os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'mergexcel'
+)
+# Bump when the cached entry layout or the parsed DataFrame format changes
+CACHE_VERSION = 2
 
-    # Traverse the objects in the folder
-    for obj in response.get('Contents', []):
-        key = obj['Key']
+# Date-only cells read as text come out as 'YYYY-MM-DD 00:00:00'; rendered back to 'YYYY-MM-DD'
+MIDNIGHT_DATETIME = r'^(\d{4}-\d{2}-\d{2}) 00:00:00$'
 
-        if key.endswith('.xlsx'):  # Process only .xlsx files
-            bank_name = key.split('/')[1]  # Bank folder is the second part of the path
+# String values that represent a missing cell and are blanked during cleaning
+NULL_STRINGS = ['nan', 'None', 'none', 'NULL', 'null', 'NaT']
 
-            # Keep track of the latest .xlsx file for each bank
-            if bank_name not in latest_files:
-                latest_files[bank_name] = key
-            else:
-                # Compare timestamps (last_modified) and pick the latest
-                if obj['LastModified'] > s3_client.head_object(Bucket=bucket_name, Key=latest_files[bank_name])['LastModified']:
-                    latest_files[bank_name] = key
-
-    return latest_files
-
-def find_column_by_variations(df, target_name, variations):
+def _latest_xlsx_for_prefix(bucket_name, prefix):
     """
-    Find a column in DataFrame by checking multiple variations (case-insensitive).
-    Returns the actual column name if found, None otherwise.
+    Return (key, last_modified) of the newest .xlsx file under one bank prefix, or None.
     """
-    # Create a mapping of lowercase column names to actual column names
-    col_map = {col.lower().strip(): col for col in df.columns}
+    latest = None
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith('.xlsx') and (latest is None or obj['LastModified'] > latest[1]):
+                latest = (obj['Key'], obj['LastModified'])
+    return latest
 
-    # Check each variation
-    for variation in variations:
-        if variation.lower() in col_map:
-            return col_map[variation.lower()]
+def get_latest_xlsx_files_from_s3(bucket_name, base_folder):
+    """
+    Get the latest .xlsx files from the bank subfolders in S3.
+    """
+    # List the bank folders (CommonPrefixes) directly under the base folder (bank_data)
+    paginator = s3_client.get_paginator('list_objects_v2')
+    prefixes = [
+        common_prefix['Prefix']
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=base_folder, Delimiter='/')
+        for common_prefix in page.get('CommonPrefixes', [])
+    ]
 
-    # Also check if target_name already exists
-    if target_name.lower() in col_map:
-        return col_map[target_name.lower()]
+    # List each bank folder concurrently, keeping only its newest .xlsx file;
+    # a listing error skips just that bank folder
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        future_to_prefix = {
+            executor.submit(_latest_xlsx_for_prefix, bucket_name, prefix): prefix
+            for prefix in prefixes
+        }
+        for future in concurrent.futures.as_completed(future_to_prefix):
+            prefix = future_to_prefix[future]
+            try:
+                results[prefix] = future.result()
+            except Exception as e:
+                logger.error(f"  ERROR listing {prefix}: {str(e)}")
+
+    # Keep the folder order so the merged output is deterministic
+    latest_files = {}
+    for prefix in prefixes:
+        latest = results.get(prefix)
+        if latest:
+            bank_name = prefix.split('/')[1]  # Bank folder is the second part of the path
+            latest_files[bank_name] = latest[0]
 
-    return None
+    return latest_files
 
-def find_branch_name_column_aggressive(df):
-    """
-    Aggressively search for branch name column using multiple strategies.
-    Returns the column name if found, None otherwise.
-    """
-    # Strategy 1: Check all known variations
-    branch_variations = [
+# Known header variations for each standard column name (matched case-insensitively)
+COLUMN_VARIATIONS = {
+    'Bank Name': ['Bank Name', 'Bank', 'BANK NAME', 'BANK', 'bank name', 'bank', 'BankName', 'BANKNAME'],
+    'Branch Name': [
         'Branch Name', 'Branch', 'BRANCH NAME', 'BRANCH', 'branch name', 'branch',
         'BranchName', 'BRANCHNAME', 'Branch_Name', 'BRANCH_NAME', 'branch_name',
         'Branch  Name', 'BRANCH  NAME', 'Branch  name', 'BRANCH  NAME',
@@ -91,9 +152,57 @@ def find_branch_name_column_aggressive(df):
         'Office', 'OFFICE', 'office',
         'Location', 'LOCATION', 'location',
         'Branch Address', 'BRANCH ADDRESS', 'Branch Address', 'branch address'
-    ]
-
-    found_col = find_column_by_variations(df, 'Branch Name', branch_variations)
+    ],
+    'IFSC': ['IFSC', 'ifsc', 'Ifsc', 'IFSC CODE', 'ifsc code', 'IFSC_CODE', 'ifsc_code', 'IFSC Code'],
+    'ADDRESS': ['ADDRESS', 'Address', 'address', 'ADDR', 'Addr', 'addr'],
+    'CITY': ['CITY', 'City', 'city'],
+    'CITY2': ['CITY2', 'City2', 'city2', 'CITY 2', 'City 2'],
+    'STATE': ['STATE', 'State', 'state'],
+    'STD CODE': ['STD CODE', 'Std Code', 'std code', 'STDCODE', 'StdCode', 'STD_CODE', 'std_code'],
+    'PHONE': ['PHONE', 'Phone', 'phone', 'PHONE NUMBER', 'Phone Number', 'phone number', 'PHONENUMBER', 'PhoneNumber']
+}
+
+def _as_text(series):
+    """
+    Return a column as STRING_DTYPE text. Columns read from the file already are and are
+    returned as-is (a str round trip would turn Arrow strings back into Python objects).
+    """
+    if series.dtype == STRING_DTYPE:
+        return series
+    return series.astype(str).astype(STRING_DTYPE)
+
+def _non_empty_count(series):
+    """Number of values in a raw (not yet cleaned) column that are non-blank once stripped."""
+    return _as_text(series).str.strip().ne('').sum()
+
+# Lowercase variation -> (standard name, priority); built once at import.
+# Lower priority wins when a file has several columns matching the same standard name.
+_VAR_TO_CANONICAL = {}
+for _canonical, _variations in COLUMN_VARIATIONS.items():
+    for _rank, _variation in enumerate(_variations + [_canonical]):
+        _VAR_TO_CANONICAL.setdefault(_variation.lower().strip(), (_canonical, _rank))
+
+def resolve_column_renames(columns):
+    """
+    Match every column against the known variations in a single pass.
+    Returns a dict of {standard_name: actual_column} for the best match of each standard name.
+    """
+    best = {}
+    for col in columns:
+        match = _VAR_TO_CANONICAL.get(col.lower().strip())
+        if match:
+            canonical, rank = match
+            if canonical not in best or rank < best[canonical][0]:
+                best[canonical] = (rank, col)
+    return {canonical: col for canonical, (_, col) in best.items()}
+
+def find_branch_name_column_aggressive(df, log=logger):
+    """
+    Aggressively search for branch name column using multiple strategies.
+    Returns the column name if found, None otherwise.
+    """
+    # Strategy 1: Check all known variations
+    found_col = resolve_column_renames(df.columns).get('Branch Name')
     if found_col:
         return found_col
 
@@ -102,182 +211,302 @@ def find_branch_name_column_aggressive(df):
         col_lower = col.lower().strip()
         if 'branch' in col_lower and col_lower != 'bank name':
             # Check if this column has actual data (not all empty)
-            non_empty_count = df[col].astype(str).str.strip().ne('').sum()
+            non_empty_count = _non_empty_count(df[col])
             if non_empty_count > 0:
-                print(f"  Found potential branch column '{col}' with {non_empty_count} non-empty values")
+                log.debug(f"  Found potential branch column '{col}' with {non_empty_count} non-empty values")
                 return col
 
     # Strategy 3: Search for columns containing "office" or "location" (common alternatives)
     for col in df.columns:
         col_lower = col.lower().strip()
         if any(keyword in col_lower for keyword in ['office', 'location', 'details']) and col_lower != 'bank name':
-            non_empty_count = df[col].astype(str).str.strip().ne('').sum()
+            non_empty_count = _non_empty_count(df[col])
             if non_empty_count > 0:
-                print(f"  Found potential branch column '{col}' (contains office/location/details) with {non_empty_count} non-empty values")
+                log.debug(f"  Found potential branch column '{col}' (contains office/location/details) with {non_empty_count} non-empty values")
                 return col
 
     return None
 
+def _unique_headers(header_row):
+    """
+    Build column names from the header row the same way pd.read_excel does:
+    blank headers become 'Unnamed: <i>' and repeated headers get a '.<n>' suffix.
+    """
+    headers = []
+    seen = {}
+    for i, cell in enumerate(header_row):
+        name = str(cell).strip() if cell is not None else ''
+        if not name:
+            name = f'Unnamed: {i}'
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        headers.append(name)
+    return headers
+
+def _cell_value(value):
+    """
+    Convert a raw openpyxl cell value the way pd.read_excel(dtype=str, keep_default_na=False) does:
+    empty cells become '', whole-number floats lose their '.0', everything else is str().
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def read_excel_rows(file_stream):
+    """
+    Stream the active sheet of an .xlsx file with openpyxl in read-only mode.
+    Returns a DataFrame of strings using the first row as header, with empty cells as ''.
+    """
+    wb = load_workbook(file_stream, read_only=True, data_only=True)
+    try:
+        records = []
+        for row in wb.active.iter_rows(values_only=True):
+            # Trim trailing empty cells, like pandas does for openpyxl sheets
+            row = list(row)
+            while row and row[-1] is None:
+                row.pop()
+            records.append(row)
+    finally:
+        wb.close()
+
+    # Drop trailing empty rows (read-only sheets often report a padded dimension)
+    while records and not records[-1]:
+        records.pop()
+
+    if not records:
+        return pd.DataFrame()
+
+    width = max(len(row) for row in records)
+    header = _unique_headers(records[0] + [None] * (width - len(records[0])))
+    data = (
+        [_cell_value(v) for v in row] + [''] * (width - len(row))
+        for row in records[1:]
+    )
+    return pd.DataFrame.from_records(data, columns=header)
+
+def _cache_path(bank_name):
+    return os.path.join(CACHE_DIR, f'{bank_name}.pkl')
+
+def load_cached_file(bank_name, key):
+    """
+    Return the cached {'version', 'key', 'etag', 'df', 'row_count'} entry for this bank's file, or None.
+    An entry that can't be loaded (corrupt, stale or foreign) is removed and treated as a miss.
+    """
+    path = _cache_path(bank_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+        if not isinstance(cached, dict) or cached.get('version') != CACHE_VERSION:
+            raise ValueError('unknown cache entry format')
+    except Exception as e:
+        logger.warning(f"  ⚠ Discarding unreadable cache entry for {bank_name}: {str(e)}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return cached if cached.get('key') == key else None
+
+def save_cached_file(bank_name, key, etag, df, row_count):
+    """
+    Store a parsed bank file with the ETag it was read at. Failures only disable caching.
+    """
+    path = _cache_path(bank_name)
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        entry = {'version': CACHE_VERSION, 'key': key, 'etag': etag, 'df': df, 'row_count': row_count}
+        with open(f'{path}.tmp', 'wb') as f:
+            pickle.dump(entry, f)
+        os.replace(f'{path}.tmp', path)
+    except OSError as e:
+        logger.warning(f"  ⚠ Could not cache parsed file for {bank_name}: {str(e)}")
+
 def read_xlsx_from_s3(bucket_name, key, bank_name):
     """
     Read an .xlsx file from S3 and return a pandas DataFrame with standardized column names.
     Preserves ALL columns from source file - no data is dropped.
     Returns: (dataframe, original_row_count)
     """
-    response = s3_client.get_object(Bucket=bucket_name, Key=key)
+    log = BankLogger(logger, {'bank': bank_name})
+    log.info(f"Processing file: {key}")
+
+    # Skip download and parsing when the file is unchanged since it was last cached
+    cached = load_cached_file(bank_name, key)
+    try:
+        if cached:
+            response = s3_client.get_object(Bucket=bucket_name, Key=key, IfNoneMatch=cached['etag'])
+        else:
+            response = s3_client.get_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if cached and e.response['Error']['Code'] == '304':
+            log.debug(f"  ✓ File unchanged since last run, using cached data ({cached['row_count']} rows)")
+            return cached['df'], cached['row_count']
+        raise
+
     file_stream = BytesIO(response['Body'].read())
 
     # Read Excel file - keep ALL rows, don't skip any
     # Important parameters to preserve all data:
-    # - keep_default_na=False: Don't convert empty cells to NaN
-    # - na_values=[]: Don't treat any values as NaN
-    # - header=0: Use first row as header (default)
-    # - skiprows=None: Don't skip any rows
-    df = pd.read_excel(file_stream, keep_default_na=False, na_values=[], header=0)
+    # - keep_default_na=False, na_values=[]: empty cells become '', no value is treated as NaN
+    # - header=0: Use first row as header, no rows are skipped
+    if HAS_CALAMINE:
+        df = pd.read_excel(file_stream, engine='calamine', dtype=str, keep_default_na=False, na_values=[], header=0)
+    else:
+        # Stream the sheet in openpyxl read-only mode instead of building the full workbook
+        df = read_excel_rows(file_stream)
+    df = df.astype(STRING_DTYPE)
+    # Cells are read as their text, so numeric-looking codes keep leading zeros ('0012' stays '0012');
+    # date-only cells keep the 'YYYY-MM-DD' form a date column used to have in the merged file
+    df = df.apply(lambda col: col.str.replace(MIDNIGHT_DATETIME, r'\1', regex=True))
 
     # Get original row count immediately after reading
     original_row_count = len(df)
-    print(f"  📊 ORIGINAL ROW COUNT: {original_row_count} rows")
+    log.debug(f"  📊 ORIGINAL ROW COUNT: {original_row_count} rows")
 
     # Standardize the column names by stripping any extra spaces
     df.columns = df.columns.str.strip()
 
-    print(f"  Original columns in file: {list(df.columns)}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"  Original columns in file: {list(df.columns)}")
 
-    # Find and standardize 'Bank Name' column
-    bank_name_variations = ['Bank Name', 'Bank', 'BANK NAME', 'BANK', 'bank name', 'bank', 'BankName', 'BANKNAME']
-    bank_col = find_column_by_variations(df, 'Bank Name', bank_name_variations)
+    # Standardize all known columns (case-insensitive) in a single pass over the columns
+    found_columns = resolve_column_renames(df.columns)
+    rename_map = {col: canonical for canonical, col in found_columns.items() if col != canonical}
+    df.rename(columns=rename_map, inplace=True)
+    for col, canonical in rename_map.items():
+        log.debug(f"  Renamed '{col}' to '{canonical}'")
 
-    if bank_col and bank_col != 'Bank Name':
-        df.rename(columns={bank_col: 'Bank Name'}, inplace=True)
-        print(f"  Renamed '{bank_col}' to 'Bank Name'")
-    elif 'Bank Name' not in df.columns:
-        df['Bank Name'] = bank_name  # Add bank name from folder name
-        print(f"  Added 'Bank Name' column with value: {bank_name}")
+    # Add 'Bank Name' column from folder name if the file doesn't have one
+    if 'Bank Name' not in df.columns:
+        df['Bank Name'] = bank_name
+        log.debug(f"  Added 'Bank Name' column with value: {bank_name}")
 
-    # Find and standardize 'Branch Name' column - use aggressive search
-    branch_col = find_branch_name_column_aggressive(df)
+    # Find 'Branch Name' column - fall back to aggressive search if no known variation matched
+    branch_col = None
+    if 'Branch Name' not in df.columns:
+        branch_col = find_branch_name_column_aggressive(df, log)
 
-    if branch_col and branch_col != 'Branch Name':
-        # Check if the found column has actual data
-        non_empty_before = df[branch_col].astype(str).str.strip().ne('').sum()
+    if branch_col:
+        # The aggressive search only returns columns with data (and already logged the count)
         df.rename(columns={branch_col: 'Branch Name'}, inplace=True)
-        print(f"  ✓ Found and renamed '{branch_col}' to 'Branch Name' ({non_empty_before} non-empty values)")
+        log.debug(f"  ✓ Found and renamed '{branch_col}' to 'Branch Name'")
     elif 'Branch Name' not in df.columns:
-        # Last resort: Check if any column might contain branch data
-        print(f"  ⚠ Branch Name column not found. Checking all columns for potential branch data...")
+        log.warning(f"  ⚠ Branch Name column not found.")
 
-        # Show all columns and their data counts
-        for col in df.columns:
-            if col.lower() not in ['bank name', 'ifsc', 'address', 'city', 'city2', 'state', 'std code', 'phone']:
-                non_empty = df[col].astype(str).str.strip().ne('').sum()
-                if non_empty > 0:
-                    print(f"    - Column '{col}': {non_empty} non-empty values (might contain branch data)")
+        # Last resort diagnostics: show data counts of all other columns (full scan, opt-in)
+        if os.getenv('VERIFY_BRANCH'):
+            log.debug(f"  Checking all columns for potential branch data...")
+            for col in df.columns:
+                if col.lower() not in ['bank name', 'ifsc', 'address', 'city', 'city2', 'state', 'std code', 'phone']:
+                    non_empty = _non_empty_count(df[col])
+                    if non_empty > 0:
+                        log.debug(f"    - Column '{col}': {non_empty} non-empty values (might contain branch data)")
 
         df['Branch Name'] = ''  # Add empty branch name column
-        print(f"  ⚠ Added empty 'Branch Name' column - NO BRANCH DATA FOUND!")
+        log.warning(f"  ⚠ Added empty 'Branch Name' column - NO BRANCH DATA FOUND!")
     else:
         # Branch Name already exists, verify it has data
-        non_empty = df['Branch Name'].astype(str).str.strip().ne('').sum()
+        non_empty = _non_empty_count(df['Branch Name'])
         if non_empty == 0:
-            print(f"  ⚠ WARNING: 'Branch Name' column exists but is EMPTY! Searching for alternative...")
+            log.warning(f"  ⚠ WARNING: 'Branch Name' column exists but is EMPTY! Searching for alternative...")
             # Try to find alternative column
-            alt_col = find_branch_name_column_aggressive(df)
+            alt_col = find_branch_name_column_aggressive(df, log)
             if alt_col and alt_col != 'Branch Name':
                 # Copy data from alternative column
-                non_empty_alt = df[alt_col].astype(str).str.strip().ne('').sum()
+                non_empty_alt = _non_empty_count(df[alt_col])
                 if non_empty_alt > 0:
-                    df['Branch Name'] = df[alt_col].astype(str)
-                    print(f"  ✓ Copied data from '{alt_col}' to 'Branch Name' ({non_empty_alt} values)")
+                    df['Branch Name'] = _as_text(df[alt_col])
+                    log.debug(f"  ✓ Copied data from '{alt_col}' to 'Branch Name' ({non_empty_alt} values)")
                 else:
-                    print(f"  ⚠ Alternative column '{alt_col}' also empty")
+                    log.warning(f"  ⚠ Alternative column '{alt_col}' also empty")
         else:
-            print(f"  ✓ 'Branch Name' column found with {non_empty} non-empty values")
-
-    # Find and standardize 'IFSC' column
-    ifsc_variations = ['IFSC', 'ifsc', 'Ifsc', 'IFSC CODE', 'ifsc code', 'IFSC_CODE', 'ifsc_code', 'IFSC Code']
-    ifsc_col = find_column_by_variations(df, 'IFSC', ifsc_variations)
-
-    if ifsc_col and ifsc_col != 'IFSC':
-        df.rename(columns={ifsc_col: 'IFSC'}, inplace=True)
-        print(f"  Renamed '{ifsc_col}' to 'IFSC'")
-    elif 'IFSC' not in df.columns:
-        df['IFSC'] = ''  # Add empty IFSC column
-        print(f"  Added empty 'IFSC' column")
-
-    # Standardize other common columns (case-insensitive)
-    column_mappings = {
-        'ADDRESS': ['ADDRESS', 'Address', 'address', 'ADDR', 'Addr', 'addr'],
-        'CITY': ['CITY', 'City', 'city'],
-        'CITY2': ['CITY2', 'City2', 'city2', 'CITY 2', 'City 2'],
-        'STATE': ['STATE', 'State', 'state'],
-        'STD CODE': ['STD CODE', 'Std Code', 'std code', 'STDCODE', 'StdCode', 'STD_CODE', 'std_code'],
-        'PHONE': ['PHONE', 'Phone', 'phone', 'PHONE NUMBER', 'Phone Number', 'phone number', 'PHONENUMBER', 'PhoneNumber']
-    }
-
-    for standard_name, variations in column_mappings.items():
-        found_col = find_column_by_variations(df, standard_name, variations)
-        if found_col and found_col != standard_name:
-            df.rename(columns={found_col: standard_name}, inplace=True)
-            print(f"  Renamed '{found_col}' to '{standard_name}'")
-        elif standard_name not in df.columns:
-            df[standard_name] = ''  # Add missing column with empty values
-            print(f"  Added empty '{standard_name}' column")
+            log.debug(f"  ✓ 'Branch Name' column found with {non_empty} non-empty values")
+
+    # Add any other standard columns missing from the file with empty values
+    for standard_name in ['IFSC', 'ADDRESS', 'CITY', 'CITY2', 'STATE', 'STD CODE', 'PHONE']:
+        if standard_name not in df.columns:
+            df[standard_name] = ''
+            log.debug(f"  Added empty '{standard_name}' column")
 
     # Clean 'IFSC' column: Remove extra spaces, non-printing characters, and ensure it's treated as a string
     if 'IFSC' in df.columns:
-        df['IFSC'] = df['IFSC'].apply(lambda x: str(x).strip() if pd.notnull(x) else '').astype(str)
+        df['IFSC'] = _as_text(df['IFSC']).str.strip()
 
     # Clean 'Branch Name' column: Remove extra spaces and handle NaN values
     if 'Branch Name' in df.columns:
-        # Convert to string first, then clean
-        df['Branch Name'] = df['Branch Name'].astype(str)
-        df['Branch Name'] = df['Branch Name'].apply(lambda x: x.strip() if x and x != 'nan' else '')
-        # Replace 'nan' strings with empty
-        df['Branch Name'] = df['Branch Name'].replace(['nan', 'None', 'none', 'NULL', 'null'], '')
+        # Convert to string first, then clean and blank out 'nan'/'None'/... strings
+        branch = _as_text(df['Branch Name']).str.strip()
+        df['Branch Name'] = branch.mask(branch.isin(NULL_STRINGS), '')
 
         # Final verification - show branch name statistics
-        non_empty_branch = df['Branch Name'].str.strip().ne('').sum()
+        non_empty_branch = df['Branch Name'].ne('').sum()
         total_rows = len(df)
         if non_empty_branch > 0:
-            print(f"  ✓ Branch Name: {non_empty_branch}/{total_rows} rows have data")
+            log.debug(f"  ✓ Branch Name: {non_empty_branch}/{total_rows} rows have data")
         else:
-            print(f"  ⚠ WARNING: Branch Name is EMPTY for all {total_rows} rows!")
+            log.warning(f"  ⚠ WARNING: Branch Name is EMPTY for all {total_rows} rows!")
 
     # Clean 'Bank Name' column: Remove extra spaces and handle NaN values
     if 'Bank Name' in df.columns:
-        df['Bank Name'] = df['Bank Name'].apply(lambda x: str(x).strip() if pd.notnull(x) else '').astype(str)
-        # Fill any empty bank names with the bank_name parameter
-        df['Bank Name'] = df['Bank Name'].replace('', bank_name)
+        # A file holds only a handful of distinct bank names, so clean the unique values once
+        # and map them back by code; fill any empty bank names with the bank_name parameter
+        codes, uniques = pd.factorize(_as_text(df['Bank Name']))
+        cleaned = pd.Series(uniques).str.strip().replace('', bank_name)
+        df['Bank Name'] = pd.Series(cleaned.array.take(codes), index=df.index)
 
-    # Fill all NaN values with empty strings to prevent data loss
-    # Use fillna with inplace=False to avoid dropping rows
-    df = df.fillna('')
+    # Convert all columns to string type to prevent type mismatches during merge.
+    # Columns read from the file already are; only convert the ones added or rebuilt above.
+    non_str_cols = df.columns[df.dtypes != STRING_DTYPE]
+    if len(non_str_cols):
+        df[non_str_cols] = df[non_str_cols].astype(str).astype(STRING_DTYPE)
 
-    # Convert all columns to string type to prevent type mismatches during merge
-    # Do this carefully to preserve all rows
-    for col in df.columns:
-        # Convert to string, handling NaN properly
-        df[col] = df[col].astype(str)
-        # Replace 'nan' string (from NaN conversion) with empty string
-        df[col] = df[col].replace(['nan', 'None', 'none', 'NULL', 'null', 'NaT'], '')
+    # Replace 'nan'/'None'/... strings with empty strings in a single vectorized pass
+    df = df.mask(df.isin(NULL_STRINGS), '')
 
     # Final row count check
     final_row_count = len(df)
-    print(f"  Final columns: {list(df.columns)}")
-    print(f"  📊 FINAL ROW COUNT: {final_row_count} rows")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"  Final columns: {list(df.columns)}")
+    log.debug(f"  📊 FINAL ROW COUNT: {final_row_count} rows")
 
     # Verify no rows were lost
     if final_row_count != original_row_count:
-        print(f"  ⚠⚠⚠ WARNING: ROW COUNT MISMATCH! Original: {original_row_count}, Final: {final_row_count}")
-        print(f"  ⚠⚠⚠ LOST {original_row_count - final_row_count} ROWS DURING PROCESSING!")
+        log.warning(f"  ⚠⚠⚠ WARNING: ROW COUNT MISMATCH! Original: {original_row_count}, Final: {final_row_count}")
+        log.warning(f"  ⚠⚠⚠ LOST {original_row_count - final_row_count} ROWS DURING PROCESSING!")
     else:
-        print(f"  ✓ Row count verified: {final_row_count} rows (no rows lost)")
+        log.debug(f"  ✓ Row count verified: {final_row_count} rows (no rows lost)")
+
+    save_cached_file(bank_name, key, response['ETag'], df, original_row_count)
 
     return df, original_row_count
 
 
 
+def write_xlsx_streaming(df, path, sheet_name):
+    """
+    Write a DataFrame of strings to an .xlsx file row by row with xlsxwriter's
+    constant_memory mode, so the rows are flushed to disk instead of kept in memory.
+    """
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False
+    })
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, list(df.columns))
+        for row_idx, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row_idx, 0, row)
+    finally:
+        workbook.close()
+
 def merge_and_save_xlsx(bucket_name, base_folder, output_file):
     """
     Merges the latest .xlsx files from all bank subfolders and saves as a single .xlsx file.
@@ -286,29 +515,45 @@ def merge_and_save_xlsx(bucket_name, base_folder, output_file):
     latest_files = get_latest_xlsx_files_from_s3(bucket_name, base_folder)
 
     if not latest_files:
-        print("No Excel files found in S3 bucket!")
+        logger.warning("No Excel files found in S3 bucket!")
         return
 
-    print(f"\nFound {len(latest_files)} bank files to process:\n")
+    logger.info(f"\nFound {len(latest_files)} bank files to process:\n")
     for bank_name, file_key in latest_files.items():
-        print(f"  - {bank_name}: {file_key}")
+        logger.debug(f"  - {bank_name}: {file_key}")
 
     all_dataframes = []
-    all_columns = set()
     file_row_counts = {}  # Track row counts per file
     total_input_rows = 0  # Total rows from all input files
 
-    # First pass: Read all files and collect all unique columns
-    print("\n" + "="*60)
-    print("STEP 1: Reading and standardizing all files...")
-    print("="*60)
-
+    # First pass: Read and standardize all files
+    logger.info("\n" + "="*60)
+    logger.info("STEP 1: Reading and standardizing all files...")
+    logger.info("="*60)
+
+    # Download and parse all files concurrently (network-bound), keyed by bank
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        future_to_bank = {
+            executor.submit(read_xlsx_from_s3, bucket_name, file_key, bank_name): bank_name
+            for bank_name, file_key in latest_files.items()
+        }
+        for future in concurrent.futures.as_completed(future_to_bank):
+            bank_name = future_to_bank[future]
+            try:
+                results[bank_name] = future.result()
+            except Exception as e:
+                logger.error(f"  ERROR processing {latest_files[bank_name]}: {str(e)}")
+
+    # Collect results in the original bank order so the merged output is deterministic
     for bank_name, file_key in latest_files.items():
-        print(f"\nProcessing file: {file_key} for bank: {bank_name}")
+        if bank_name not in results:
+            continue
 
+        log = BankLogger(logger, {'bank': bank_name})
         try:
-            # Read each file into a DataFrame
-            df, original_row_count = read_xlsx_from_s3(bucket_name, file_key, bank_name)
+            # Pop so all_dataframes holds the only reference once it's concatenated and freed
+            df, original_row_count = results.pop(bank_name)
 
             # Track row counts
             file_row_counts[bank_name] = {
@@ -317,189 +562,163 @@ def merge_and_save_xlsx(bucket_name, base_folder, output_file):
             }
             total_input_rows += original_row_count
 
-            # Collect all columns from this file
-            all_columns.update(df.columns)
             all_dataframes.append(df)
 
             # Verify critical columns exist and have data
             critical_cols = ['Bank Name', 'Branch Name', 'IFSC']
             missing_critical = [col for col in critical_cols if col not in df.columns]
             if missing_critical:
-                print(f"  ⚠ WARNING: Missing critical columns: {missing_critical}")
+                log.warning(f"  ⚠ WARNING: Missing critical columns: {missing_critical}")
 
-            # Check if Branch Name has data
+            # Check if Branch Name has data (already stripped by read_xlsx_from_s3)
             if 'Branch Name' in df.columns:
-                branch_data_count = df['Branch Name'].astype(str).str.strip().ne('').sum()
+                branch_data_count = df['Branch Name'].ne('').sum()
                 total_rows = len(df)
                 if branch_data_count == 0:
-                    print(f"  ⚠ CRITICAL: Branch Name column exists but is EMPTY for all {total_rows} rows!")
+                    log.warning(f"  ⚠ CRITICAL: Branch Name column exists but is EMPTY for all {total_rows} rows!")
                 elif branch_data_count < total_rows:
-                    print(f"  ⚠ WARNING: Branch Name has data for only {branch_data_count}/{total_rows} rows")
+                    log.warning(f"  ⚠ WARNING: Branch Name has data for only {branch_data_count}/{total_rows} rows")
                 else:
-                    print(f"  ✓ Branch Name: {branch_data_count}/{total_rows} rows have data")
+                    log.debug(f"  ✓ Branch Name: {branch_data_count}/{total_rows} rows have data")
 
         except Exception as e:
-            print(f"  ERROR processing {file_key}: {str(e)}")
+            log.error(f"  ERROR processing {file_key}: {str(e)}")
             continue
 
     if not all_dataframes:
-        print("\nNo files were successfully processed!")
+        logger.error("\nNo files were successfully processed!")
         return
 
-    # Second pass: Ensure all DataFrames have all columns (fill missing with empty strings)
-    print("\n" + "="*60)
-    print("STEP 2: Aligning columns across all files...")
-    print("="*60)
-
-    all_columns = sorted(list(all_columns))
-    print(f"\nTotal unique columns found: {len(all_columns)}")
-    print(f"Columns: {all_columns}")
-
-    standardized_dfs = []
-    for i, df in enumerate(all_dataframes):
-        rows_before = len(df)
-
-        # Add any missing columns with empty strings
-        missing_cols = set(all_columns) - set(df.columns)
-        if missing_cols:
-            print(f"  File {i+1}: Adding {len(missing_cols)} missing columns")
-            for col in missing_cols:
-                df[col] = ''
-
-        # Reorder columns to match the standard order
-        # Put critical columns first, then others
-        critical_cols = ['Bank Name', 'Branch Name', 'IFSC']
-        other_cols = [col for col in all_columns if col not in critical_cols]
-        column_order = [col for col in critical_cols if col in all_columns] + other_cols
-
-        df = df[column_order]
-
-        rows_after = len(df)
-        if rows_before != rows_after:
-            print(f"  ⚠⚠⚠ WARNING: File {i+1} lost rows during standardization! Before: {rows_before}, After: {rows_after}")
-        else:
-            print(f"  ✓ File {i+1}: {rows_after} rows (no rows lost during standardization)")
-
-        standardized_dfs.append(df)
-
-    # Merge all DataFrames
-    print("\n" + "="*60)
-    print("STEP 3: Merging all data...")
-    print("="*60)
+    # Merge all DataFrames - concat aligns columns across files itself
+    logger.info("\n" + "="*60)
+    logger.info("STEP 2: Merging all data...")
+    logger.info("="*60)
 
     # Count rows before merge
-    total_rows_before_merge = sum(len(df) for df in standardized_dfs)
-    print(f"\nTotal rows in all DataFrames before merge: {total_rows_before_merge}")
+    total_rows_before_merge = sum(len(df) for df in all_dataframes)
+    logger.debug(f"\nTotal rows in all DataFrames before merge: {total_rows_before_merge}")
 
-    # Merge with explicit parameters to ensure no data loss
-    merged_df = pd.concat(standardized_dfs, ignore_index=True, sort=False)
+    # Outer join keeps every column from every file; cells a file doesn't have become empty strings
+    merged_df = pd.concat(all_dataframes, ignore_index=True, sort=False, join='outer').fillna('')
+    # Drop the per-bank frames (including the collect loop's last `df`) before sorting and writing
+    del all_dataframes, df
+
+    # Put critical columns first, then the others in sorted order
+    critical_cols = ['Bank Name', 'Branch Name', 'IFSC']
+    other_cols = sorted(col for col in merged_df.columns if col not in critical_cols)
+    merged_df = merged_df[[col for col in critical_cols if col in merged_df.columns] + other_cols]
+    logger.debug(f"\nTotal unique columns found: {len(merged_df.columns)}")
 
     total_output_rows = len(merged_df)
-    print(f"Total rows in merged DataFrame: {total_output_rows}")
+    logger.debug(f"Total rows in merged DataFrame: {total_output_rows}")
 
     # Verify row count
     if total_output_rows != total_rows_before_merge:
         lost_rows = total_rows_before_merge - total_output_rows
-        print(f"\n⚠⚠⚠ CRITICAL ERROR: ROWS LOST DURING MERGE!")
-        print(f"⚠⚠⚠ Expected: {total_rows_before_merge} rows")
-        print(f"⚠⚠⚠ Got: {total_output_rows} rows")
-        print(f"⚠⚠⚠ LOST: {lost_rows} rows")
+        logger.error(f"\n⚠⚠⚠ CRITICAL ERROR: ROWS LOST DURING MERGE!")
+        logger.error(f"⚠⚠⚠ Expected: {total_rows_before_merge} rows")
+        logger.error(f"⚠⚠⚠ Got: {total_output_rows} rows")
+        logger.error(f"⚠⚠⚠ LOST: {lost_rows} rows")
     else:
-        print(f"\n✓ Merge successful: All {total_output_rows} rows preserved")
+        logger.debug(f"\n✓ Merge successful: All {total_output_rows} rows preserved")
 
-    print(f"\nMerged DataFrame Statistics:")
-    print(f"  Total rows: {total_output_rows}")
-    print(f"  Total columns: {len(merged_df.columns)}")
-    print(f"  Columns: {list(merged_df.columns)}")
+    logger.debug(f"\nMerged DataFrame Statistics:")
+    logger.debug(f"  Total rows: {total_output_rows}")
+    logger.debug(f"  Total columns: {len(merged_df.columns)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"  Columns: {list(merged_df.columns)}")
 
-    # Verify critical data
-    print(f"\nData Verification:")
-    print(f"  Rows with Bank Name: {merged_df['Bank Name'].astype(str).str.strip().ne('').sum()}")
-    print(f"  Rows with Branch Name: {merged_df['Branch Name'].astype(str).str.strip().ne('').sum()}")
-    print(f"  Rows with IFSC: {merged_df['IFSC'].astype(str).str.strip().ne('').sum()}")
+    # Verify critical data (these columns were stripped per file, so a plain comparison is enough)
+    logger.info(f"\nData Verification:")
+    logger.info(f"  Rows with Bank Name: {merged_df['Bank Name'].ne('').sum()}")
+    logger.info(f"  Rows with Branch Name: {merged_df['Branch Name'].ne('').sum()}")
+    logger.info(f"  Rows with IFSC: {merged_df['IFSC'].ne('').sum()}")
 
     # Check for any completely empty rows
     empty_rows = merged_df.isnull().all(axis=1).sum()
     if empty_rows > 0:
-        print(f"  WARNING: Found {empty_rows} completely empty rows")
+        logger.warning(f"  WARNING: Found {empty_rows} completely empty rows")
 
     # ========== CRITICAL: ROW COUNT VERIFICATION BEFORE SAVING ==========
-    print("\n" + "="*70)
-    print("="*70)
-    print("CRITICAL ROW COUNT VERIFICATION - BEFORE SAVING")
-    print("="*70)
-    print("="*70)
-
-    print(f"\n📊 INPUT FILES ROW COUNTS:")
-    print("-" * 70)
+    logger.info("\n" + "="*70)
+    logger.info("="*70)
+    logger.info("CRITICAL ROW COUNT VERIFICATION - BEFORE SAVING")
+    logger.info("="*70)
+    logger.info("="*70)
+
+    logger.info(f"\n📊 INPUT FILES ROW COUNTS:")
+    logger.info("-" * 70)
     for bank_name, counts in file_row_counts.items():
-        print(f"  {bank_name:30s}: {counts['original']:6d} rows")
-    print("-" * 70)
-    print(f"  {'TOTAL INPUT ROWS':30s}: {total_input_rows:6d} rows")
+        logger.info(f"  {bank_name:30s}: {counts['original']:6d} rows")
+    logger.info("-" * 70)
+    logger.info(f"  {'TOTAL INPUT ROWS':30s}: {total_input_rows:6d} rows")
 
-    print(f"\n📊 OUTPUT FILE ROW COUNT:")
-    print("-" * 70)
-    print(f"  {'MERGED FILE ROWS':30s}: {total_output_rows:6d} rows")
-    print("-" * 70)
+    logger.info(f"\n📊 OUTPUT FILE ROW COUNT:")
+    logger.info("-" * 70)
+    logger.info(f"  {'MERGED FILE ROWS':30s}: {total_output_rows:6d} rows")
+    logger.info("-" * 70)
 
-    print(f"\n📊 VERIFICATION:")
-    print("-" * 70)
+    logger.info(f"\n📊 VERIFICATION:")
+    logger.info("-" * 70)
 
     # CRITICAL CHECK: Only proceed if row counts match
     if total_output_rows != total_input_rows:
         lost_rows = total_input_rows - total_output_rows
-        print(f"  ❌❌❌ CRITICAL ERROR: ROW COUNT MISMATCH!")
-        print(f"  ❌❌❌ Input: {total_input_rows} rows")
-        print(f"  ❌❌❌ Output: {total_output_rows} rows")
-        print(f"  ❌❌❌ LOST: {lost_rows} rows ({lost_rows/total_input_rows*100:.2f}%)")
-        print("-" * 70)
-        print(f"\n🚫🚫🚫 ABORTING FILE SAVE - DATA LOSS DETECTED!")
-        print(f"🚫🚫🚫 The merged file will NOT be saved to S3.")
-        print(f"🚫🚫🚫 Please review the code and fix the data loss issue.")
-        print(f"🚫🚫🚫 Expected {total_input_rows} rows but got {total_output_rows} rows.")
-        print("="*70)
+        logger.error(f"  ❌❌❌ CRITICAL ERROR: ROW COUNT MISMATCH!")
+        logger.error(f"  ❌❌❌ Input: {total_input_rows} rows")
+        logger.error(f"  ❌❌❌ Output: {total_output_rows} rows")
+        logger.error(f"  ❌❌❌ LOST: {lost_rows} rows ({lost_rows/total_input_rows*100:.2f}%)")
+        logger.error("-" * 70)
+        logger.error(f"\n🚫🚫🚫 ABORTING FILE SAVE - DATA LOSS DETECTED!")
+        logger.error(f"🚫🚫🚫 The merged file will NOT be saved to S3.")
+        logger.error(f"🚫🚫🚫 Please review the code and fix the data loss issue.")
+        logger.error(f"🚫🚫🚫 Expected {total_input_rows} rows but got {total_output_rows} rows.")
+        logger.error("="*70)
         return  # Exit function without saving
 
     # Row counts match - proceed with saving
-    print(f"  ✓✓✓ SUCCESS: All rows preserved!")
-    print(f"  ✓✓✓ Input: {total_input_rows} rows = Output: {total_output_rows} rows")
-    print(f"  ✓✓✓ NO DATA LOSS - Proceeding with file save...")
-    print("-" * 70)
-    print("="*70)
+    logger.info(f"  ✓✓✓ SUCCESS: All rows preserved!")
+    logger.info(f"  ✓✓✓ Input: {total_input_rows} rows = Output: {total_output_rows} rows")
+    logger.info(f"  ✓✓✓ NO DATA LOSS - Proceeding with file save...")
+    logger.info("-" * 70)
+    logger.info("="*70)
 
     # Save the merged DataFrame to a new file (only if row counts match)
-    print("\n" + "="*60)
-    print("STEP 4: Saving merged file...")
-    print("="*60)
+    logger.info("\n" + "="*60)
+    logger.info("STEP 3: Saving merged file...")
+    logger.info("="*60)
 
+    tmp = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    tmp.close()
     try:
-        with BytesIO() as output:
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                merged_df.to_excel(writer, index=False, sheet_name='Merged Data')
-            output.seek(0)
-
-            # Upload the merged file back to S3
-            s3_client.upload_fileobj(output, bucket_name, output_file)
-
-            # Final success message
-            print("\n" + "="*70)
-            print("="*70)
-            print("FILE SAVED SUCCESSFULLY")
-            print("="*70)
-            print("="*70)
-            print(f"\n✓ Successfully saved merged file to: s3://{bucket_name}/{output_file}")
-            print(f"  Total rows in saved file: {total_output_rows}")
-            print(f"  Total columns in saved file: {len(merged_df.columns)}")
-            print(f"  ✓ Row count verified: {total_input_rows} input rows = {total_output_rows} output rows")
-            print("="*70)
+        write_xlsx_streaming(merged_df, tmp.name, 'Merged Data')
+
+        # Upload the merged file back to S3 (multipart, parts in parallel)
+        s3_client.upload_file(tmp.name, bucket_name, output_file, Config=UPLOAD_CONFIG)
+
+        # Final success message
+        logger.info("\n" + "="*70)
+        logger.info("="*70)
+        logger.info("FILE SAVED SUCCESSFULLY")
+        logger.info("="*70)
+        logger.info("="*70)
+        logger.info(f"\n✓ Successfully saved merged file to: s3://{bucket_name}/{output_file}")
+        logger.info(f"  Total rows in saved file: {total_output_rows}")
+        logger.info(f"  Total columns in saved file: {len(merged_df.columns)}")
+        logger.info(f"  ✓ Row count verified: {total_input_rows} input rows = {total_output_rows} output rows")
+        logger.info("="*70)
 
     except Exception as e:
-        print(f"\n❌ ERROR: Failed to save file to S3: {str(e)}")
-        print(f"  File was not saved due to error.")
+        logger.error(f"\n❌ ERROR: Failed to save file to S3: {str(e)}")
+        logger.error(f"  File was not saved due to error.")
         raise
+    finally:
+        os.remove(tmp.name)
 
 # Run the merge process
 if __name__ == "__main__":
+    logging.basicConfig(format='%(message)s')
+
     # Output file name for the merged data from environment variable
     OUTPUT_FILE = os.getenv('S3_OUTPUT_FILE', 'merged_bank_data.xlsx')
 
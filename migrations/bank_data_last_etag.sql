@@ -0,0 +1,5 @@
+-- One-off migration for restore_excel_to_db.py's skip-unchanged-files check.
+-- Run once as the owner of bank_data:
+--   psql -h $DB_HOST -U <owner> -d $DB_NAME -f migrations/bank_data_last_etag.sql
+-- Until it has run, the restore processes every bank and records no ETags.
+ALTER TABLE bank_data ADD COLUMN IF NOT EXISTS last_etag TEXT;
@@ -1,11 +1,16 @@
 import os
 import io
+import csv
+import atexit
 import re
 import boto3
+import concurrent.futures
+import multiprocessing
+from contextlib import contextmanager
 import pandas as pd
-import psycopg2
 import numpy as np
-from psycopg2.extras import execute_batch
+from botocore.config import Config
+from psycopg2.pool import ThreadedConnectionPool
 
 # ===============================
 # CONFIG
@@ -18,25 +23,72 @@ DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 
+MAX_WORKERS = 16
+# S3 listing calls are pure latency, so resolve every bank's latest file with more threads
+S3_WORKERS = 32
+
+# Mapped rows are buffered across banks and upserted in one transaction per this many rows
+FLUSH_ROWS = 10_000
+
+# Excel parsing is CPU-bound, so it runs in worker processes instead of the download threads
+PARSE_WORKERS = os.cpu_count() or 1
+
+# Rust-backed calamine parses Excel much faster than openpyxl/xlrd; use pandas' default engines if not installed
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
 # ===============================
 # CLIENTS
 # ===============================
-s3 = boto3.client("s3")
-
+# One shared client: a pool larger than any thread stage, adaptive retries to back off on
+# throttling, and TCP keep-alive so idle pooled connections are not silently dropped
+s3 = boto3.client("s3", config=Config(
+    max_pool_connections=64,
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    tcp_keepalive=True,
+))
+
+# Opened at startup so a bad DB config fails fast, and reused for every flush. Worker threads
+# only download and parse; the main thread does all DB work, one connection at a time.
+# Raise maxconn if DB work is ever moved onto the worker threads.
+POOL = ThreadedConnectionPool(
+    1, 1,
+    host=DB_HOST,
+    database=DB_NAME,
+    user=DB_USER,
+    password=DB_PASSWORD
+)
+atexit.register(POOL.closeall)
+
+@contextmanager
 def db_conn():
-    return psycopg2.connect(
-        host=DB_HOST,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD
-    )
+    """
+    Check a connection out of POOL, commit on success, roll back on error,
+    and always hand it back to the pool.
+    """
+    conn = POOL.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        POOL.putconn(conn)
 
 # ===============================
 # NORMALIZATION
 # ===============================
+_NORM = re.compile(r"[^a-z0-9_]")
+# \D is Unicode-aware, so full-width and other-script digits survive phone/std_code cleaning
+_NONDIGIT = re.compile(r"\D")
+
 def normalize(col: str) -> str:
     # Normalize to lowercase snake-ish: BANK_NAME -> bank_name, IFSC CODE -> ifsc_code
-    return re.sub(r"[^a-z0-9_]", "", str(col).strip().lower().replace(" ", "_"))
+    return _NORM.sub("", str(col).strip().lower().replace(" ", "_"))
 
 
 COLUMN_PRIORITY = {
@@ -51,6 +103,9 @@ COLUMN_PRIORITY = {
     "phone":       ["phone", "phone_no", "phoneno", "telephone", "contact"],
 }
 
+# Every source column map_columns can use; other columns are skipped when reading
+ALLOWED_SOURCE_COLS = frozenset(src for sources in COLUMN_PRIORITY.values() for src in sources)
+
 LIMITS = {
     "bank_name": 100,
     "branch_name": 100,
@@ -75,53 +130,65 @@ DB_COLUMNS = [
     "phone",
 ]
 
+# Columns reduced to digits only; all others are stripped text
+DIGIT_COLUMNS = ["phone", "std_code"]
+TEXT_COLUMNS = [c for c in DB_COLUMNS if c not in DIGIT_COLUMNS]
+
 # ===============================
 # HELPERS
 # ===============================
-def clean_digits(val, limit):
-    if val is None or pd.isna(val):
-        return ""
-    cleaned = re.sub(r"\D", "", str(val))
-    return cleaned[:limit]
-
-def truncate(val, limit):
-    if val is None or pd.isna(val):
-        return ""
-    return str(val).strip()[:limit]
-
 def list_bank_folders():
     """
     Returns: ["Woori_Bank", "Natwest_Markets_PLC", ...]
     """
-    result = s3.list_objects_v2(
-        Bucket=S3_BUCKET,
-        Prefix=S3_PREFIX,
-        Delimiter="/"
-    )
-    return [p["Prefix"].split("/")[1] for p in result.get("CommonPrefixes", [])]
+    # Paginate so more than 1000 bank folders are not silently truncated
+    paginator = s3.get_paginator("list_objects_v2")
+    return [
+        p["Prefix"].split("/")[1]
+        for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=S3_PREFIX, Delimiter="/")
+        for p in page.get("CommonPrefixes", [])
+    ]
 
 def latest_excel_for_bank(bank_folder: str):
     """
     Picks latest .xlsx/.xls file under bank_data/<bank_folder>/
+    Returns (s3_path, etag), or None if the folder has no Excel file.
     """
-    result = s3.list_objects_v2(
+    # Fold the newest Excel object across every page instead of building a file list
+    paginator = s3.get_paginator("list_objects_v2")
+    latest = None
+    for page in paginator.paginate(
         Bucket=S3_BUCKET,
-        Prefix=f"{S3_PREFIX}{bank_folder}/"
-    )
-    files = [
-        obj for obj in result.get("Contents", [])
-        if obj.get("Key", "").lower().endswith((".xlsx", ".xls"))
-    ]
-    if not files:
+        Prefix=f"{S3_PREFIX}{bank_folder}/",
+        PaginationConfig={"PageSize": 1000},
+    ):
+        for obj in page.get("Contents", []):
+            if obj.get("Key", "").lower().endswith((".xlsx", ".xls")) and (
+                latest is None or obj["LastModified"] > latest["LastModified"]
+            ):
+                latest = obj
+    if latest is None:
         return None
-    latest = max(files, key=lambda x: x["LastModified"])
-    return f"s3://{S3_BUCKET}/{latest['Key']}"
+    return f"s3://{S3_BUCKET}/{latest['Key']}", latest["ETag"]
 
-def load_excel_from_s3(s3_path: str) -> pd.DataFrame:
+def download_excel(s3_path: str) -> bytes:
     key = s3_path.replace(f"s3://{S3_BUCKET}/", "")
-    obj = s3.get_object(Bucket=S3_BUCKET, Key=key)
-    df = pd.read_excel(io.BytesIO(obj["Body"].read()), dtype=str)
-    df.columns = [normalize(c) for c in df.columns]
+    # The raw bytes are what gets handed to a parse worker; read() makes the only copy
+    return s3.get_object(Bucket=S3_BUCKET, Key=key)["Body"].read()
+
+def read_excel_bytes(payload: bytes) -> pd.DataFrame:
+    df = pd.read_excel(
+        io.BytesIO(payload),
+        dtype=str,
+        engine=EXCEL_ENGINE,
+        usecols=lambda c: normalize(c) in ALLOWED_SOURCE_COLS,
+    )
+    # Same steps as normalize(), applied to the whole header at once
+    df.columns = (
+        df.columns.astype(str).str.strip().str.lower()
+        .str.replace(" ", "_", regex=False)
+        .str.replace(_NORM, "", regex=True)
+    )
     return df
 
 def map_columns(df: pd.DataFrame, bank_folder_name: str) -> pd.DataFrame:
@@ -129,70 +196,83 @@ def map_columns(df: pd.DataFrame, bank_folder_name: str) -> pd.DataFrame:
     Create a normalized dataframe with DB_COLUMNS using COLUMN_PRIORITY.
     IMPORTANT: No IFSC prefix checks, no IFSC mutation, no bank_name derivation from IFSC.
     """
-    out = pd.DataFrame(index=df.index)
-
-    # Map all targets from priorities
+    # Pick the highest-priority source column present for each target
+    source_for = {}
+    columns = df.columns
     for target, sources in COLUMN_PRIORITY.items():
         for src in sources:
-            if src in df.columns:
-                out[target] = df[src]
+            if src in columns:
+                source_for[target] = src
                 break
-        if target not in out:
-            out[target] = None
+
+    # Build the output as a dict of columns and wrap it in a DataFrame once at the end;
+    # assigning into a frame copies the target block on every write. The nullable "string"
+    # dtype carries missing values through the .str ops below as <NA>.
+    missing = pd.Series(pd.NA, index=df.index, dtype="string")
+    out = {
+        target: df[source_for[target]].astype("string") if target in source_for else missing
+        for target in DB_COLUMNS
+    }
 
     # Fallback for bank_name ONLY if missing entirely/blank in file
     if out["bank_name"].isna().all() or (out["bank_name"].fillna("").str.strip() == "").all():
-        out["bank_name"] = bank_folder_name.replace("_", " ").strip()
-
-    # Replace NaN with None
-    out = out.replace({np.nan: None})
+        out["bank_name"] = pd.Series(bank_folder_name.replace("_", " ").strip(), index=df.index, dtype="string")
 
-    # Clean/truncate
-    for col in DB_COLUMNS:
-        if col in ["phone", "std_code"]:
-            out[col] = out[col].apply(lambda x: clean_digits(x, LIMITS[col]))
-        else:
-            out[col] = out[col].apply(lambda x: truncate(x, LIMITS[col]))
+    # Clean/truncate (one vectorized pass per column); missing values become ""
+    limits = LIMITS  # local binding, looked up once per column below
+    for col in DIGIT_COLUMNS:
+        out[col] = out[col].str.replace(_NONDIGIT, "", regex=True).str.slice(0, limits[col]).fillna("")
+    for col in TEXT_COLUMNS:
+        out[col] = out[col].str.strip().str.slice(0, limits[col]).fillna("")
 
     # IFSC cleanup (NO PREFIX VALIDATION)
     # ---------- FIX MISSING BRANCH NAME ----------
-    out["branch_name"] = out["branch_name"].apply(
-        lambda x: None if x is None or str(x).strip() == "" else x
-    )
-
-    out.loc[out["branch_name"].isna(), "branch_name"] = (
-        out.loc[out["branch_name"].isna(), "address"]
-    )
-
-    out.loc[out["branch_name"].isna(), "branch_name"] = (
-        out.loc[out["branch_name"].isna(), "city1"]
+    out["branch_name"] = (
+        out["branch_name"]
+        .replace("", np.nan)
+        .fillna(out["address"])
+        .fillna(out["city1"])
+        .fillna("MAIN BRANCH")
     )
 
-    out.loc[out["branch_name"].isna(), "branch_name"] = "MAIN BRANCH"
-
-
-    # Drop only truly invalid rows (Rule 4)
-    out = out[
-        out["ifsc_code"].notna() &
-        (out["ifsc_code"] != "") 
-    ]
-
-    # De-dup in-file
-    out = out.drop_duplicates(subset=["ifsc_code", "branch_name"])
+    out = pd.DataFrame(out, columns=DB_COLUMNS, copy=False)
 
-    return out[DB_COLUMNS]
+    # Drop only truly invalid rows (Rule 4) and de-dup in-file in one pass
+    # (cleaning already turned missing IFSC codes into "")
+    valid = out["ifsc_code"].ne("")
+    return out.loc[valid].drop_duplicates(subset=["ifsc_code", "branch_name"], ignore_index=True)
 
 # ===============================
 # INSERT SAFE
 # ===============================
-def insert_rows_safe(rows):
+def insert_rows_safe(cur, rows: list):
+    """
+    Upsert buffered row tuples (in DB_COLUMNS order) using the caller's cursor.
+    Rows are COPYed into a temp staging table and upserted from there with one
+    INSERT ... SELECT. The caller owns the connection and commits (which drops the table).
+    """
+    # Rows from different banks can share (ifsc_code, branch_name); ON CONFLICT DO UPDATE
+    # rejects a key twice in one statement, so keep the last one (restore() buffers banks in
+    # bank_folders order, so later banks win, as when each bank was upserted in turn)
+    rows = list({(r[2], r[1]): r for r in rows}.values())
     if not rows:
         return 0
 
-    conn = db_conn()
-    cur = conn.cursor()
+    # Quote every field so empty strings stay '' instead of being read back as NULL
+    buf = io.StringIO()
+    csv.writer(buf, quoting=csv.QUOTE_ALL).writerows(rows)
+    buf.seek(0)
 
-    sql = """
+    print(f"💾 Inserting {len(rows)} rows into the database.")
+    # Stage only the loaded columns (types copied, no constraints/defaults/identity), so the
+    # real table's key and sequences are untouched until the INSERT ... SELECT below
+    columns = ", ".join(DB_COLUMNS)
+    cur.execute(f"""
+        CREATE TEMP TABLE stg_bank_details ON COMMIT DROP AS
+        SELECT {columns} FROM master_bank_details_copy WITH NO DATA;
+    """)
+    cur.copy_expert(f"COPY stg_bank_details ({columns}) FROM STDIN WITH CSV", buf)
+    cur.execute("""
         INSERT INTO master_bank_details_copy (
             bank_name,
             branch_name,
@@ -204,7 +284,17 @@ def insert_rows_safe(rows):
             std_code,
             phone
         )
-        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        SELECT
+            bank_name,
+            branch_name,
+            ifsc_code,
+            address,
+            city1,
+            city2,
+            state,
+            std_code,
+            phone
+        FROM stg_bank_details
         ON CONFLICT (ifsc_code, branch_name)
         DO UPDATE SET
             bank_name = EXCLUDED.bank_name,
@@ -214,16 +304,25 @@ def insert_rows_safe(rows):
             state     = EXCLUDED.state,
             std_code  = EXCLUDED.std_code,
             phone     = EXCLUDED.phone;
-    """
-    print(f"💾 Inserting {len(rows)} rows into the database.")
-    execute_batch(cur, sql, rows, page_size=1000)
-    conn.commit()
-
-    
-    cur.close()
-    conn.close()
+    """)
     return len(rows)
 
+def flush_rows(rows: list, etags: list):
+    """
+    Upsert one buffer of rows on a pooled connection with a single commit; once it has
+    committed, record the (etag, s3_path) of every bank whose rows it held as restored.
+    Returns the number of rows sent (0 if the upsert failed).
+    """
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            inserted = insert_rows_safe(cur, rows)
+    except Exception as e:
+        print(f"❌ Failed to insert {len(rows)} buffered rows: {e}")
+        return 0
+    if etags:
+        record_restored_etags(etags)
+    return inserted
+
 # ===============================
 # REMOVE DUPLICATES IN DB
 # ===============================
@@ -233,79 +332,197 @@ def remove_duplicates():
     NOTE: Your previous query kept ONLY duplicates and deleted the rest (buggy).
     This one keeps the first row and deletes extra duplicates.
     """
-    conn = db_conn()
-    cur = conn.cursor()
     try:
-        cur.execute("""
-            WITH ranked AS (
-              SELECT ctid,
-                     ROW_NUMBER() OVER (PARTITION BY ifsc_code, branch_name ORDER BY ctid) AS rn
-              FROM master_bank_details_copy
-            )
-            DELETE FROM master_bank_details_copy
-            WHERE ctid IN (SELECT ctid FROM ranked WHERE rn > 1);
-        """)
-        conn.commit()
+        with db_conn() as conn, conn.cursor() as cur:
+            # Self-join delete: keeps the lowest-ctid row of each key, without a window sort.
+            # The unique (ifsc_code, branch_name) index that ON CONFLICT already requires
+            # can drive the join.
+            cur.execute("""
+                DELETE FROM master_bank_details_copy t
+                USING master_bank_details_copy t2
+                WHERE t.ifsc_code = t2.ifsc_code
+                  AND t.branch_name = t2.branch_name
+                  AND t.ctid > t2.ctid;
+            """)
+            # '=' never matches NULL, so rows with a NULL key (legacy data; the unique index
+            # doesn't stop these) are de-duplicated in a second pass grouping NULLs together,
+            # as PARTITION BY did. Restricting both sides to NULL keys keeps this pass small.
+            cur.execute("""
+                DELETE FROM master_bank_details_copy t
+                USING master_bank_details_copy t2
+                WHERE (t.ifsc_code IS NULL OR t.branch_name IS NULL)
+                  AND (t2.ifsc_code IS NULL OR t2.branch_name IS NULL)
+                  AND t.ifsc_code IS NOT DISTINCT FROM t2.ifsc_code
+                  AND t.branch_name IS NOT DISTINCT FROM t2.branch_name
+                  AND t.ctid > t2.ctid;
+            """)
         print("✅ Duplicates removed successfully.")
     except Exception as e:
         print(f"❌ Failed to remove duplicates: {e}")
-    finally:
-        cur.close()
-        conn.close()
 
 # ===============================
-# MAIN
+# RESTORE STATE
 # ===============================
-def restore():
-    # Step 1: remove duplicates only (DO NOT mutate IFSC codes)
-    remove_duplicates()
+def load_restored_etags():
+    """
+    Returns {s3_path: last_etag} for processed banks, where last_etag is the ETag of
+    the file last restored from that path. Unchanged files are skipped without download.
+    Returns None if the ETags can't be read (e.g. migrations/bank_data_last_etag.sql
+    hasn't been run); every bank is then restored and no ETags are recorded.
+    """
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT s3_path, last_etag
+                FROM bank_data
+                WHERE processed AND last_etag IS NOT NULL;
+            """)
+            return dict(cur.fetchall())
+    except Exception as e:
+        print(f"⚠️ Could not load restored ETags, restoring every bank: {e}")
+        return None
 
-    bank_folders = list_bank_folders()
-    print(f"📂 Found {len(bank_folders)} banks to process.")
+def record_restored_etags(etags: list):
+    """
+    Store (etag, s3_path) pairs of restored files. Runs in its own transaction after the
+    upsert has committed, so a bookkeeping failure never rolls back restored rows
+    (the file is just processed again next run).
+    """
+    try:
+        with db_conn() as conn, conn.cursor() as cur:
+            cur.executemany("UPDATE bank_data SET last_etag = %s WHERE s3_path = %s;", etags)
+    except Exception as e:
+        print(f"⚠️ Could not record restored ETags: {e}")
 
-    total_source_rows = 0
-    total_processed_rows = 0
-    total_inserted_rows = 0
+# ===============================
+# MAIN
+# ===============================
+def parse_and_map(payload: bytes, bank_folder: str):
+    """
+    Runs in a parse worker process: read the Excel bytes and map them to DB_COLUMNS.
+    Returns (source_rows, rows) with rows as plain tuples, so no pandas objects are pickled back.
+    """
+    df = read_excel_bytes(payload)
 
-    for bank_folder in bank_folders:
-        try:
-            print(f"\n📂 Processing {bank_folder}...")
+    source_rows = len(df)
+    print(f"📊 Source Excel for {bank_folder} has {source_rows} rows.")
 
-            s3_path = latest_excel_for_bank(bank_folder)
-            if not s3_path:
-                print(f"⚠️ No Excel found for {bank_folder}. Skipping.")
-                continue
+    # Quick visibility (optional)
+    # print("Columns:", df.columns.tolist())
 
-            print(f"⬇️ Processing file: {s3_path}")
+    final = map_columns(df, bank_folder)
 
-            df = load_excel_from_s3(s3_path)
+    processed_rows = len(final)
+    print(f"🔨 Processed {processed_rows} rows for {bank_folder} after mapping and cleaning.")
 
-            source_rows = len(df)
-            total_source_rows += source_rows
-            print(f"📊 Source Excel has {source_rows} rows.")
+    if final.empty:
+        print(f"⚠️ No valid rows (need IFSC + BRANCH_NAME). Processed 0 rows for {bank_folder}")
+        return source_rows, []
 
+    return source_rows, list(final.itertuples(index=False, name=None))
 
-            # Quick visibility (optional)
-            # print("Columns:", df.columns.tolist())
+def process_bank(parse_pool, bank_folder: str, s3_path: str):
+    """
+    Download one bank's latest Excel (resolved up front by restore()) and wait for a
+    parse worker to map it. Returns (source_rows, rows) from parse_and_map.
+    """
+    print(f"\n📂 Processing {bank_folder}...")
+    print(f"⬇️ Processing file: {s3_path}")
 
-            final = map_columns(df, bank_folder)
+    payload = download_excel(s3_path)
+    return parse_pool.submit(parse_and_map, payload, bank_folder).result()
 
-            processed_rows = len(final)
-            total_processed_rows += processed_rows
-            print(f"🔨 Processed {processed_rows} rows after mapping and cleaning.")
+def restore():
+    # Workers are forked so they don't re-run this module's S3/DB client setup. With fork the
+    # executor starts every worker on the first submit, so do that now, before any threads exist.
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("fork")
+    ) as parse_pool:
+        parse_pool.submit(int).result()
+        _restore(parse_pool)
+
+def _restore(parse_pool):
+    # Step 1: remove duplicates only (DO NOT mutate IFSC codes)
+    remove_duplicates()
 
-            if final.empty:
-                print(f"⚠️ No valid rows (need IFSC + BRANCH_NAME). Processed 0 rows for {bank_folder}")
-                continue
+    bank_folders = list_bank_folders()
+    print(f"📂 Found {len(bank_folders)} banks to process.")
 
-            rows = final.values.tolist()
-            inserted = insert_rows_safe(rows)
-            total_inserted_rows += inserted
+    # Resolve every bank's latest file first so the download/parse workers only get real work
+    restored_etags = load_restored_etags()
+    track_etags = restored_etags is not None
+    restored_etags = restored_etags or {}
+    latest_files = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=S3_WORKERS) as executor:
+        future_to_bank = {
+            executor.submit(latest_excel_for_bank, bank_folder): bank_folder
+            for bank_folder in bank_folders
+        }
+        for future in concurrent.futures.as_completed(future_to_bank):
+            bank_folder = future_to_bank[future]
+            try:
+                latest_files[bank_folder] = future.result()
+            except Exception as e:
+                print(f"❌ Failed {bank_folder}: {e}")
+
+    to_process = {}
+    for bank_folder in bank_folders:
+        if bank_folder not in latest_files:
+            continue
+        latest = latest_files[bank_folder]
+        if not latest:
+            print(f"⚠️ No Excel found for {bank_folder}. Skipping.")
+        elif restored_etags.get(latest[0]) == latest[1]:
+            print(f"⏭️ {bank_folder} unchanged since last restore. Skipping.")
+        else:
+            to_process[bank_folder] = latest
 
-            print(f"✅ Processed {inserted} rows into the database for {bank_folder}")
+    total_source_rows = 0
+    total_processed_rows = 0
+    total_inserted_rows = 0
+    buffer = []
+    pending_etags = []
+
+    # Banks are independent: download them concurrently and parse them in parse_pool;
+    # their rows are upserted here in large batches instead of one transaction per bank
+    # Results are buffered in bank_folders order rather than completion order, so the same
+    # input always decides which bank's row wins a shared (ifsc_code, branch_name)
+    order = list(to_process)
+    completed = {}
+    next_bank = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        future_to_bank = {
+            executor.submit(process_bank, parse_pool, bank_folder, s3_path): bank_folder
+            for bank_folder, (s3_path, etag) in to_process.items()
+        }
+        for future in concurrent.futures.as_completed(future_to_bank):
+            bank_folder = future_to_bank[future]
+            try:
+                completed[bank_folder] = future.result()
+            except Exception as e:
+                print(f"❌ Failed {bank_folder}: {e}")
+                completed[bank_folder] = None
+
+            while next_bank < len(order) and order[next_bank] in completed:
+                bank_folder = order[next_bank]
+                next_bank += 1
+                result = completed.pop(bank_folder)
+                if result is None:
+                    continue
+                source_rows, rows = result
+                s3_path, etag = to_process[bank_folder]
+                total_source_rows += source_rows
+                total_processed_rows += len(rows)
+                buffer.extend(rows)
+                if track_etags:
+                    pending_etags.append((etag, s3_path))
+                if len(buffer) >= FLUSH_ROWS:
+                    total_inserted_rows += flush_rows(buffer, pending_etags)
+                    buffer, pending_etags = [], []
+
+    if buffer or pending_etags:
+        total_inserted_rows += flush_rows(buffer, pending_etags)
 
-        except Exception as e:
-            print(f"❌ Failed {bank_folder}: {e}")
     print("\nSummary:")
     print(f"📊 Total rows in source Excel: {total_source_rows}")
     print(f"🔨 Total rows processed: {total_processed_rows}")
@@ -1,11 +1,21 @@
 import os
 import time
+import atexit
+from contextlib import contextmanager
 import io
 import boto3
-import psycopg2
-import pandas as pd
+from botocore.config import Config
+from openpyxl import load_workbook
+from psycopg2.pool import SimpleConnectionPool
 from playwright.sync_api import sync_playwright
 
+# Rust-backed calamine reads workbooks much faster than openpyxl; fall back to openpyxl if not installed
+try:
+    from python_calamine import CalamineWorkbook
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
 # =========================
 # CONFIG
 # =========================
@@ -21,34 +31,53 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 # =========================
 # DB
 # =========================
+# The scraper is single-threaded and writes one bank_data row per downloaded file, so a
+# single connection, opened at startup (a bad DB config fails before scraping), serves every write
+POOL = SimpleConnectionPool(
+    1, 1,
+    host=DB_HOST,
+    database=DB_NAME,
+    user=DB_USER,
+    password=DB_PASSWORD
+)
+atexit.register(POOL.closeall)
+
+@contextmanager
 def connect_db():
-    return psycopg2.connect(
-        host=DB_HOST,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD
-    )
+    """
+    Borrow the scraper's connection for one bank_data write: commit on success,
+    roll back on error, and always return it for the next bank.
+    """
+    conn = POOL.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        POOL.putconn(conn)
 
 def update_bank_metadata(bank_name, s3_path, processed):
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO bank_data (bank_name, s3_path, processed, created_at, updated_at)
-        VALUES (%s, %s, %s, NOW(), NOW())
-        ON CONFLICT (bank_name)
-        DO UPDATE SET
-            s3_path = EXCLUDED.s3_path,
-            processed = EXCLUDED.processed,
-            updated_at = NOW();
-    """, (bank_name, s3_path, processed))
-    conn.commit()
-    cur.close()
-    conn.close()
+    with connect_db() as conn, conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO bank_data (bank_name, s3_path, processed, created_at, updated_at)
+            VALUES (%s, %s, %s, NOW(), NOW())
+            ON CONFLICT (bank_name)
+            DO UPDATE SET
+                s3_path = EXCLUDED.s3_path,
+                processed = EXCLUDED.processed,
+                updated_at = NOW();
+        """, (bank_name, s3_path, processed))
 
 # =========================
 # S3
 # =========================
-s3 = boto3.client("s3")
+s3 = boto3.client("s3", config=Config(
+    max_pool_connections=64,
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    tcp_keepalive=True,
+))
 
 def upload_to_s3(bank_name, binary_data):
     epoch = int(time.time())
@@ -71,11 +100,25 @@ def is_valid_excel(data: bytes):
     return data[:4] == b"PK\x03\x04"
 
 def count_rows(data: bytes):
-    excel = pd.ExcelFile(io.BytesIO(data), engine="openpyxl")
-    total = 0
-    for sheet in excel.sheet_names:
-        df = excel.parse(sheet).dropna(how="all")
-        total += len(df)
+    if HAS_CALAMINE:
+        wb = CalamineWorkbook.from_filelike(io.BytesIO(data))
+        total = 0
+        for name in wb.sheet_names:
+            # Keep leading empty rows so the header is the sheet's literal first row, as with openpyxl
+            rows = wb.get_sheet_by_name(name).to_python(skip_empty_area=False)
+            total += sum(1 for row in rows[1:] if any(c != "" for c in row))
+        return total
+
+    # Stream rows in read-only mode instead of building a DataFrame per sheet
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        total = 0
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            next(rows, None)  # The first row is the header, not data
+            total += sum(1 for row in rows if any(c is not None for c in row))
+    finally:
+        wb.close()
     return total
 
 # =========================